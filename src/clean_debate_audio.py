@@ -11,6 +11,9 @@ python scripts/clean_debate_audio.py "https://youtu.be/VIDEO_ID" --no-diar
 # Use GPU and keep top‑2 speakers
 python scripts/clean_debate_audio.py "https://youtu.be/VIDEO_ID" --gpu
 
+# Also write one FLAC stem per debater + JSON segment index
+python scripts/clean_debate_audio.py "https://youtu.be/VIDEO_ID" --stems --format flac
+
 # Show all flags
 python scripts/clean_debate_audio.py -h
 """
@@ -21,7 +24,7 @@ import logging
 import sys
 from pathlib import Path
 
-from debate_audio import DebateAudioPipeline
+from debate_audio import DebateAudioPipeline, StemExporter
 from debate_audio.enhancers.metricgan import MetricGANEnhancer
 from debate_audio.enhancers.demucs import DemucsEnhancer
 
@@ -59,6 +62,17 @@ parser.add_argument(
     action="store_true",
     help="Save raw and enhanced WAV files alongside the final output",
 )
+parser.add_argument(
+    "--stems",
+    action="store_true",
+    help="Write one track per kept speaker plus a JSON segment index",
+)
+parser.add_argument(
+    "--format",
+    choices=("wav", "flac", "opus"),
+    default="wav",
+    help="Output codec for the cleaned mix and stems (tracks are encoded concurrently)",
+)
 
 def main() -> None:
     # run --> python src\clean_debate_audio.py "https://www.youtube.com/watch?v=OTp8ImYnM6U" --gpu
@@ -68,18 +82,33 @@ def main() -> None:
     device = "cuda" if args.gpu else "cpu"
     enhancer = MetricGANEnhancer(device=device)
 
+    # Diarisation only runs when per‑speaker stems are requested; the
+    # default run keeps the plain enhanced mix.
     diarizer = None
-    if not args.no_diar and PyannoteDiarizer is not None:
-        diarizer = PyannoteDiarizer(num_speakers=2, device=device)
+    if args.stems and not args.no_diar and PyannoteDiarizer is not None:
+        try:
+            diarizer = PyannoteDiarizer(num_speakers=2, device=device)
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("Diarisation disabled (%s)", exc)
+
+    if args.stems and diarizer is None:
+        parser.error("--stems needs speaker diarisation (pyannote.audio + HF token, no --no-diar)")
+
+    exporter = None
+    if args.stems or args.format != "wav":
+        exporter = StemExporter(fmt=args.format, stems=args.stems)
 
     # pipe = DebateAudioPipeline(
     #     enhancer=enhancer,
     #     diarizer=diarizer,
     #     work_dir=args.out,
+    #     exporter=exporter,
     # )
     pipe = DebateAudioPipeline(
     enhancer=DemucsEnhancer(device="cuda"),
-    diarizer=None        # try without first
+    diarizer=diarizer,
+    work_dir=args.out,
+    exporter=exporter,
 )
     try:
         #pipe.clean(args.url, keep_intermediates=args.keep_intermediates)
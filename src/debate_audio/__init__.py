@@ -16,6 +16,7 @@ import importlib.metadata as _ilm
 
 # Re‑export library‑facing classes for convenience
 from .downloader import AudioDownloader
+from .export import StemExporter
 from .pipeline import DebateAudioPipeline
 try:
     from .enhancers.metricgan import MetricGANEnhancer
@@ -26,6 +27,7 @@ __all__ = [
     "AudioDownloader",
     "DebateAudioPipeline",
     "MetricGANEnhancer",
+    "StemExporter",
 ]
 
 # Package version (falls back to "0.0.0" in editable installs)
@@ -13,9 +13,8 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Literal, final
+from typing import Any, Literal, final
 import os
-#from huggingface_hub import HfHubHTTPError
 
 
 from ..enhancers.base import BaseEnhancer  # import just for type hints
@@ -51,18 +50,21 @@ class PyannoteDiarizer:
                 "→ pip install pyannote.audio"
             ) from e
 
+        from huggingface_hub.utils import HfHubHTTPError
+
         # model card: https://huggingface.co/pyannote/speaker-diarization
         try:
             self._pl = Pipeline.from_pretrained(
                 "pyannote/speaker-diarization@2.1",
                 use_auth_token=os.getenv("HUGGING_FACE_HUB_TOKEN"),
             )
-        except (HfHubHTTPError, ValueError):
-            log.warning("pyannote model gated or token missing -> diarisation disabled.")
-            self._pl = None
+        except (HfHubHTTPError, ValueError) as e:
+            raise RuntimeError("pyannote model gated or token missing -> diarisation unavailable.") from e
+        # `from_pretrained` returns None (after printing a hint) for gated models
+        if self._pl is None:
+            raise RuntimeError("pyannote model gated or token missing -> diarisation unavailable.")
 
-        if self._pl is not None:
-            self._pl.to(device)
+        self._pl.to(device)
         self._num = num_speakers
 
         # torchaudio is a pyannote dep, but we check explicitly for clarity
@@ -72,27 +74,46 @@ class PyannoteDiarizer:
             raise ImportError("`torchaudio` is required for PyannoteDiarizer.") from e
 
     # ------------------------------------------------------------------ #
-    def filter_top_speakers(self, in_wav: Path, out_wav: Path) -> None:
+    def diarize(self, in_wav: Path) -> tuple[Any, set[str]]:
         """
-        Analyse `in_wav`, keep top‑N loudest speakers, write to `out_wav`.
+        Run the pyannote pipeline once on `in_wav`.
+
+        Returns
+        -------
+        tuple[pyannote.core.Annotation, set[str]]
+            The raw annotation and the labels of the top‑N loudest speakers.
         """
-        import torch
+        diar, top_labels, _, _ = self._analyse(in_wav)
+        return diar, top_labels
+
+    def _analyse(self, in_wav: Path) -> tuple[Any, set[str], Any, int]:
+        """Diarise `in_wav` and rank labels by energy; also return the waveform."""
         import torchaudio  # type: ignore
 
         diar = self._pl(in_wav)
+        waveform, sr = torchaudio.load(in_wav)  # (channels, n_samples)
         speaker_energy: dict[str, float] = {}
 
-        # Aggregate energy per speaker
-        for segment, track, label in diar.itertracks(yield_label=True):
-            samples = track.data  # (n_frames,) torch Tensor
+        # Aggregate energy per speaker from the decoded waveform
+        for segment, _, label in diar.itertracks(yield_label=True):
+            samples = waveform[:, int(segment.start * sr) : int(segment.end * sr)]
             speaker_energy[label] = speaker_energy.get(label, 0.0) + samples.pow(2).sum().item()
 
         top_labels = {
             lbl for lbl, _ in sorted(speaker_energy.items(), key=lambda kv: kv[1], reverse=True)[: self._num]
         }
         log.debug("Retaining speakers: %s", ", ".join(sorted(top_labels)))
+        return diar, top_labels, waveform, sr
 
-        waveform, sr = torchaudio.load(in_wav)  # (channels, n_samples)
+    # ------------------------------------------------------------------ #
+    def filter_top_speakers(self, in_wav: Path, out_wav: Path) -> None:
+        """
+        Analyse `in_wav`, keep top‑N loudest speakers, write to `out_wav`.
+        """
+        import torch
+        import torchaudio  # type: ignore
+
+        diar, top_labels, waveform, sr = self._analyse(in_wav)
         mask = torch.zeros_like(waveform)
 
         # Build a binary mask of desired segments
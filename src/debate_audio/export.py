@@ -0,0 +1,270 @@
+"""
+export.py
+~~~~~~~~~
+Output stage: write the mixed debate track plus (optionally) one stem per
+kept speaker, together with a JSON index of each speaker's time segments.
+
+The enhanced WAV is never held in memory as a whole. A first streaming
+pass finds the peak level; the tracks are then encoded concurrently on a
+thread pool, each worker reading only the spans it keeps, block by block.
+Peak memory is therefore about one block per worker.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import shutil
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Literal, Optional
+
+log = logging.getLogger(__name__)
+
+__all__: list[str] = ["StemExporter"]
+
+AudioFormat = Literal["wav", "flac", "opus"]
+
+# soundfile subtypes per container. FLAC is integer‑only, so use its widest
+# subtype; levels are kept within ±1.0 by the shared gain in `export`.
+_SUBTYPES: dict[str, str] = {"wav": "FLOAT", "flac": "PCM_24"}
+
+
+class StemExporter:
+    """
+    Write the mixed output and per‑speaker stems.
+
+    Every track is scaled by the same gain: if the enhanced audio peaks
+    above ±1.0 it is peak‑normalised, so FLAC (24‑bit integer) does not
+    clip where WAV (float) would not, and all formats sound the same.
+
+    Parameters
+    ----------
+    fmt : Literal["wav", "flac", "opus"]
+        Container/codec for every written track.
+    stems : bool
+        Also write one track per kept speaker and the JSON segment index.
+        When ``False`` only the (diarised) mix is written.
+    max_workers : int
+        Number of tracks encoded concurrently.
+    block_size : int
+        Samples read and encoded per chunk.
+    opus_bitrate : str
+        Target bitrate handed to ffmpeg's libopus encoder.
+    """
+
+    def __init__(
+        self,
+        fmt: AudioFormat = "wav",
+        stems: bool = True,
+        max_workers: int = 4,
+        block_size: int = 1 << 18,
+        opus_bitrate: str = "64k",
+    ) -> None:
+        if fmt not in ("wav", "flac", "opus"):
+            raise ValueError(f"Unsupported export format: {fmt!r}")
+        if fmt == "opus" and shutil.which("ffmpeg") is None:
+            raise EnvironmentError("ffmpeg not found on PATH. Please install it.")
+
+        self.fmt = fmt
+        self.stems = stems
+        self.max_workers = max_workers
+        self.block_size = block_size
+        self.opus_bitrate = opus_bitrate
+
+    # ------------------------------------------------------------------ #
+    def export(
+        self,
+        in_wav: Path,
+        out_dir: Path,
+        annotation: Optional[Any] = None,
+        speakers: Optional[Iterable[str]] = None,
+        *,
+        stem_name: str = "debate_clean",
+    ) -> Path:
+        """
+        Write `<stem_name>.<fmt>` to `out_dir`. With an annotation and
+        ``stems=True``, also write one `<stem_name>_<speaker>.<fmt>` per kept
+        speaker plus `<stem_name>_segments.json`.
+
+        Parameters
+        ----------
+        in_wav : Path
+            Enhanced audio to slice.
+        out_dir : Path
+            Destination directory (normally the pipeline's `work_dir`).
+        annotation : pyannote.core.Annotation | None
+            Diarisation result; ``None`` writes only the (re‑encoded) mix.
+        speakers : Iterable[str] | None
+            Labels to keep; defaults to every label in `annotation`.
+
+        Returns
+        -------
+        Path
+            Filesystem location of the mixed output.
+        """
+        import numpy as np
+        import soundfile as sf
+
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        info = sf.info(str(in_wav))
+        sr, n_samples = info.samplerate, info.frames
+        peak = 0.0
+        for block in sf.blocks(str(in_wav), blocksize=self.block_size, dtype="float32", always_2d=True):
+            peak = max(peak, float(np.abs(block).max(initial=0.0)))
+        gain = 1.0 / peak if peak > 1.0 else 1.0
+        if gain != 1.0:
+            log.info("Enhanced audio peaks at %.2f – normalising all tracks to ±1.0", peak)
+
+        segments = _collect_segments(annotation, speakers)
+        mix_path = out_dir / f"{stem_name}.{self.fmt}"
+        index: dict[str, Any] = {"sample_rate": sr, "format": self.fmt, "mix": mix_path.name, "speakers": {}}
+
+        tracks: list[tuple[Optional[list[tuple[int, int]]], Path]] = []
+        if segments is None:
+            tracks.append((None, mix_path))
+        else:
+            all_spans = [span for spans in segments.values() for span in spans]
+            tracks.append((_merge_spans(_to_samples(all_spans, sr), n_samples), mix_path))
+            if self.stems:
+                for label, spans in segments.items():
+                    stem_path = out_dir / f"{stem_name}_{_safe(label)}.{self.fmt}"
+                    tracks.append((_merge_spans(_to_samples(spans, sr), n_samples), stem_path))
+                    index["speakers"][label] = {
+                        "file": stem_path.name,
+                        "segments": [[round(s, 3), round(e, 3)] for s, e in spans],
+                        "speech_seconds": round(sum(e - s for s, e in spans), 3),
+                    }
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            jobs: list[Future[None]] = [
+                pool.submit(self._encode, in_wav, spans, gain, out_path) for spans, out_path in tracks
+            ]
+            for job in jobs:
+                job.result()  # re‑raise encoder failures
+
+        if index["speakers"]:
+            index_path = out_dir / f"{stem_name}_segments.json"
+            index_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+            log.info("Speaker segment index written → %s", index_path)
+
+        log.info("Exported %d track(s) as %s → %s", len(jobs), self.fmt.upper(), out_dir)
+        return mix_path
+
+    # ------------------------------------------------------------------ #
+    def _encode(
+        self, in_wav: Path, spans: Optional[list[tuple[int, int]]], gain: float, out_path: Path
+    ) -> None:
+        """Read `in_wav` restricted to `spans` and stream it, block by block, to `out_path`."""
+        import soundfile as sf
+
+        with sf.SoundFile(str(in_wav)) as src:
+            sr, channels = src.samplerate, src.channels
+            blocks = _render_blocks(src, spans, gain, self.block_size)
+
+            if self.fmt == "opus":
+                self._encode_opus(blocks, sr, channels, out_path)
+            else:
+                with sf.SoundFile(
+                    str(out_path), "w", samplerate=sr, channels=channels,
+                    format=self.fmt.upper(), subtype=_SUBTYPES[self.fmt],
+                ) as dst:
+                    for block in blocks:
+                        dst.write(block)
+        log.debug("Encoded → %s", out_path)
+
+    def _encode_opus(self, blocks: Iterator[Any], sr: int, channels: int, out_path: Path) -> None:
+        """Pipe raw PCM `blocks` into ffmpeg's libopus encoder – no intermediate WAV."""
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "f32le", "-ar", str(sr), "-ac", str(channels), "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", self.opus_bitrate,
+            str(out_path),
+        ]
+        log.debug("Running shell command: %s", " ".join(cmd))
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        assert proc.stdin is not None
+        try:
+            for block in blocks:
+                proc.stdin.write(block.tobytes())
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its stderr explains why
+        finally:
+            _, stderr = proc.communicate()  # closes stdin, reaps the process
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=stderr)
+
+
+def _collect_segments(
+    annotation: Optional[Any], speakers: Optional[Iterable[str]]
+) -> Optional[dict[str, list[tuple[float, float]]]]:
+    """Group `annotation` tracks into sorted ``(start, end)`` spans per label."""
+    if annotation is None:
+        return None
+
+    keep = set(speakers) if speakers is not None else None
+    segments: dict[str, list[tuple[float, float]]] = {}
+    for segment, _, label in annotation.itertracks(yield_label=True):
+        if keep is None or label in keep:
+            segments.setdefault(label, []).append((float(segment.start), float(segment.end)))
+
+    for spans in segments.values():
+        spans.sort()
+    return dict(sorted(segments.items()))
+
+
+def _to_samples(spans: list[tuple[float, float]], sr: int) -> list[tuple[int, int]]:
+    """Convert ``(start, end)`` seconds to sample offsets at rate `sr`."""
+    return [(int(start * sr), int(end * sr)) for start, end in spans]
+
+
+def _merge_spans(spans: list[tuple[int, int]], n_samples: int) -> list[tuple[int, int]]:
+    """Clip `spans` to ``[0, n_samples)`` and merge overlapping/adjacent ones."""
+    merged: list[list[int]] = []
+    for start, end in sorted(spans):
+        start, end = max(0, start), min(n_samples, end)
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _render_blocks(
+    src: Any, spans: Optional[list[tuple[int, int]]], gain: float, block_size: int
+) -> Iterator[Any]:
+    """
+    Yield `src` (an open ``soundfile.SoundFile``) in `block_size` chunks,
+    silenced outside the merged `spans` and scaled by `gain`. Only the kept
+    spans are read; ``spans=None`` keeps everything.
+    """
+    import numpy as np
+
+    n_samples, channels = src.frames, src.channels
+    i = 0
+    for a in range(0, n_samples, block_size):
+        b = min(a + block_size, n_samples)
+        if spans is None:
+            src.seek(a)
+            block = src.read(b - a, dtype="float32", always_2d=True)
+        else:
+            block = np.zeros((b - a, channels), dtype="float32")
+            while i < len(spans) and spans[i][1] <= a:
+                i += 1
+            j = i
+            while j < len(spans) and spans[j][0] < b:
+                s, e = max(a, spans[j][0]), min(b, spans[j][1])
+                src.seek(s)
+                block[s - a : e - a] = src.read(e - s, dtype="float32", always_2d=True)
+                j += 1
+        yield block * gain if gain != 1.0 else block
+
+
+def _safe(label: str) -> str:
+    """Make a diarisation label safe for use in a filename."""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(label))
@@ -4,6 +4,7 @@ pipeline.py
 End‑to‑end orchestration:
 
 YouTube URL ─▶ download WAV ─▶ enhance ─▶ (optional) diarise ─▶ save cleaned WAV
+                                                               └─▶ (optional) export mix + per‑speaker stems
 """
 
 from __future__ import annotations
@@ -13,9 +14,10 @@ import shutil
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from .downloader import AudioDownloader
+from .export import StemExporter
 
 # Type stubs—actual implementations live under `enhancers/` and `diarization/`
 class BaseEnhancer:  # pragma: no cover
@@ -33,6 +35,10 @@ class BaseDiarizer:  # pragma: no cover
         """Keep only the desired speakers and write a new WAV."""
         raise NotImplementedError
 
+    def diarize(self, in_wav: Path) -> tuple[Any, set[str]]:
+        """Return the diarisation annotation and the labels to keep."""
+        raise NotImplementedError
+
 
 log = logging.getLogger(__name__)
 
@@ -49,6 +55,10 @@ class DebateAudioPipeline:
         Optional speaker‑diarisation component.
     work_dir : Path | str
         Directory to store intermediate and final artefacts.
+    exporter : StemExporter | None
+        Optional output stage that writes the mix plus one stem per kept
+        speaker (FLAC/Opus/WAV) into `work_dir` in a single pass, instead
+        of the plain WAV.
     """
 
     def __init__(
@@ -56,9 +66,11 @@ class DebateAudioPipeline:
         enhancer: BaseEnhancer,
         diarizer: Optional[BaseDiarizer] = None,
         work_dir: Path | str = Path("./output"),
+        exporter: Optional[StemExporter] = None,
     ) -> None:
         self.enhancer = enhancer
         self.diarizer = diarizer
+        self.exporter = exporter
         self.work_dir = Path(work_dir)
         self.work_dir.mkdir(parents=True, exist_ok=True)
         self.downloader = AudioDownloader(self.work_dir)
@@ -71,7 +83,8 @@ class DebateAudioPipeline:
         Returns
         -------
         Path
-            Filesystem location of the final cleaned WAV.
+            Filesystem location of the final cleaned audio (the mix, when an
+            exporter is configured).
         """
         with tempfile.TemporaryDirectory() as tmpdir:
             tmpdir_p = Path(tmpdir)
@@ -81,7 +94,14 @@ class DebateAudioPipeline:
             log.info("Enhancing …")
             self.enhancer.enhance_file(raw, enhanced)
 
-            if self.diarizer:
+            if self.exporter:
+                annotation, speakers = None, None
+                if self.diarizer:
+                    log.info("Applying diarisation …")
+                    annotation, speakers = self.diarizer.diarize(enhanced)
+                log.info("Exporting tracks …")
+                final = self.exporter.export(enhanced, self.work_dir, annotation, speakers)
+            elif self.diarizer:
                 log.info("Applying diarisation …")
                 final = self.work_dir / "debate_clean.wav"
                 self.diarizer.filter_top_speakers(enhanced, final)
@@ -99,5 +119,6 @@ class DebateAudioPipeline:
     def __repr__(self) -> str:  # pragma: no cover
         return (
             f"<DebateAudioPipeline enhancer={self.enhancer.__class__.__name__} "
-            f"diarizer={self.diarizer and self.diarizer.__class__.__name__}>"
+            f"diarizer={self.diarizer and self.diarizer.__class__.__name__} "
+            f"exporter={self.exporter and self.exporter.fmt}>"
         )
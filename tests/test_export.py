@@ -0,0 +1,172 @@
+"""Behaviour checks for the stem exporter's span, masking and index logic."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+
+from debate_audio.export import (  # noqa: E402
+    StemExporter,
+    _collect_segments,
+    _merge_spans,
+    _render_blocks,
+)
+
+SR = 100
+
+
+class StubAnnotation:
+    """Minimal stand‑in for `pyannote.core.Annotation`."""
+
+    def __init__(self, tracks: list[tuple[float, float, str]]) -> None:
+        self._tracks = tracks
+
+    def itertracks(self, yield_label: bool = False):
+        for i, (start, end, label) in enumerate(self._tracks):
+            yield SimpleNamespace(start=start, end=end), i, label
+
+
+@pytest.fixture
+def ramp_wav(tmp_path: Path) -> Path:
+    """Two‑channel, 3 s WAV whose samples are distinct and non‑zero."""
+    n = 3 * SR
+    data = np.stack([np.arange(1, n + 1), -np.arange(1, n + 1)], axis=1).astype("float32") / (2 * n)
+    path = tmp_path / "in.wav"
+    sf.write(path, data, SR, subtype="FLOAT")
+    return path
+
+
+def _expected(path: Path, spans: list[tuple[int, int]]) -> "np.ndarray":
+    data, _ = sf.read(path, dtype="float32", always_2d=True)
+    out = np.zeros_like(data)
+    for start, end in spans:
+        out[start:end] = data[start:end]
+    return out
+
+
+# ---------------------------------------------------------------------- #
+def test_merge_spans_merges_overlaps_and_clips_to_file() -> None:
+    spans = [(250, 400), (10, 30), (-5, 5), (20, 50), (50, 60), (90, 90)]
+    assert _merge_spans(spans, n_samples=300) == [(0, 5), (10, 60), (250, 300)]
+
+
+def test_merge_spans_drops_spans_past_end() -> None:
+    assert _merge_spans([(400, 500)], n_samples=300) == []
+
+
+def test_render_blocks_masks_across_block_boundaries(ramp_wav: Path) -> None:
+    spans = _merge_spans([(5, 25), (20, 40), (95, 130), (290, 400)], n_samples=3 * SR)
+    with sf.SoundFile(ramp_wav) as src:
+        blocks = list(_render_blocks(src, spans, gain=1.0, block_size=16))
+
+    assert all(len(b) <= 16 for b in blocks)
+    np.testing.assert_array_equal(np.concatenate(blocks), _expected(ramp_wav, spans))
+
+
+def test_render_blocks_without_spans_applies_gain(ramp_wav: Path) -> None:
+    with sf.SoundFile(ramp_wav) as src:
+        out = np.concatenate(list(_render_blocks(src, None, gain=0.5, block_size=64)))
+    data, _ = sf.read(ramp_wav, dtype="float32", always_2d=True)
+    np.testing.assert_allclose(out, data * 0.5)
+
+
+def test_collect_segments_filters_and_sorts() -> None:
+    ann = StubAnnotation([(2.0, 2.5, "B"), (0.0, 1.0, "A"), (1.0, 1.5, "C"), (0.5, 0.8, "B")])
+    assert _collect_segments(ann, {"A", "B"}) == {"A": [(0.0, 1.0)], "B": [(0.5, 0.8), (2.0, 2.5)]}
+    assert set(_collect_segments(ann, None)) == {"A", "B", "C"}
+    assert _collect_segments(None, None) is None
+
+
+# ---------------------------------------------------------------------- #
+def test_export_writes_mix_stems_and_index(ramp_wav: Path, tmp_path: Path) -> None:
+    ann = StubAnnotation([(0.0, 1.0, "SPK 0"), (0.8, 1.5, "SPK_1"), (2.0, 2.5, "SPK 0"), (2.5, 3.0, "AUD")])
+    out_dir = tmp_path / "out"
+    exporter = StemExporter(fmt="wav", block_size=32, max_workers=2)
+
+    mix = exporter.export(ramp_wav, out_dir, ann, {"SPK 0", "SPK_1"})
+
+    assert mix == out_dir / "debate_clean.wav"
+    assert sorted(p.name for p in out_dir.iterdir()) == [
+        "debate_clean.wav",
+        "debate_clean_SPK_0.wav",
+        "debate_clean_SPK_1.wav",
+        "debate_clean_segments.json",
+    ]
+    np.testing.assert_array_equal(
+        sf.read(mix, dtype="float32", always_2d=True)[0], _expected(ramp_wav, [(0, 150), (200, 250)])
+    )
+    np.testing.assert_array_equal(
+        sf.read(out_dir / "debate_clean_SPK_0.wav", dtype="float32", always_2d=True)[0],
+        _expected(ramp_wav, [(0, 100), (200, 250)]),
+    )
+
+    index = json.loads((out_dir / "debate_clean_segments.json").read_text())
+    assert index == {
+        "sample_rate": SR,
+        "format": "wav",
+        "mix": "debate_clean.wav",
+        "speakers": {
+            "SPK 0": {"file": "debate_clean_SPK_0.wav", "segments": [[0.0, 1.0], [2.0, 2.5]], "speech_seconds": 1.5},
+            "SPK_1": {"file": "debate_clean_SPK_1.wav", "segments": [[0.8, 1.5]], "speech_seconds": 0.7},
+        },
+    }
+
+
+def test_export_without_stems_writes_only_mix(ramp_wav: Path, tmp_path: Path) -> None:
+    ann = StubAnnotation([(0.0, 1.0, "A"), (2.0, 2.5, "B")])
+    out_dir = tmp_path / "out"
+
+    StemExporter(fmt="flac", stems=False).export(ramp_wav, out_dir, ann)
+
+    assert [p.name for p in out_dir.iterdir()] == ["debate_clean.flac"]
+
+
+def test_export_peak_normalises_hot_input(tmp_path: Path) -> None:
+    src = tmp_path / "hot.wav"
+    sf.write(src, np.array([[0.5], [-2.0], [1.0]], dtype="float32"), SR, subtype="FLOAT")
+
+    mix = StemExporter(fmt="flac").export(src, tmp_path / "out")
+
+    out, _ = sf.read(mix, dtype="float32", always_2d=True)
+    np.testing.assert_allclose(out[:, 0], [0.25, -1.0, 0.5], atol=1e-6)
+
+
+def test_export_writes_no_index_when_encoding_fails(ramp_wav: Path, tmp_path: Path, monkeypatch) -> None:
+    def boom(*args, **kwargs):
+        raise RuntimeError("encoder failed")
+
+    exporter = StemExporter(fmt="wav")
+    monkeypatch.setattr(exporter, "_encode", boom)
+    out_dir = tmp_path / "out"
+
+    with pytest.raises(RuntimeError):
+        exporter.export(ramp_wav, out_dir, StubAnnotation([(0.0, 1.0, "A")]))
+
+    assert not (out_dir / "debate_clean_segments.json").exists()
+
+
+def test_opus_encoder_failure_raises_with_stderr(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "ffmpeg"
+    fake.write_text("#!/bin/sh\necho 'libopus not available' >&2\nexit 3\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+    # Large enough to overflow the pipe buffer, so writes hit BrokenPipeError
+    src = tmp_path / "long.wav"
+    sf.write(src, np.full((1 << 18, 2), 0.1, dtype="float32"), SR, subtype="FLOAT")
+
+    exporter = StemExporter(fmt="opus", block_size=1 << 12)
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        exporter.export(src, tmp_path / "out")
+
+    assert exc.value.returncode == 3
+    assert b"libopus not available" in exc.value.stderr